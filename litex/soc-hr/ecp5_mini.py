@@ -10,18 +10,25 @@
 # SPDX-License-Identifier: BSD-2-Clause
 
 import os
+import re
 import sys
+import hashlib
 import argparse
+import functools
+import subprocess
+import importlib.util
 
 from migen import *
-from migen.genlib.misc import WaitTimer
 from migen.genlib.resetsync import AsyncResetSynchronizer
 
 from platform import ecp5_mini
 
 from litehyperbus.core.hyperbus import HyperRAM
 
+from litex.build.lattice.trellis import trellis_args, trellis_argdict
+
 from litex.soc.cores.clock import *
+from litex.soc.integration.soc import SoCRegion
 from litex.soc.integration.soc_core import *
 from litex.soc.integration.builder import *
 from litex.soc.cores.led import LedChaser
@@ -66,34 +73,51 @@ class _CRG(Module):
             usb_pll.create_clkout(self.cd_usb_12, 12e6)
 
         # FPGA Reset (press usr_btn for 1 second to fallback to bootloader)
-        reset_timer = WaitTimer(int(16e6))
-        reset_timer = ClockDomainsRenamer("por")(reset_timer)
-        self.submodules += reset_timer
-        self.comb += reset_timer.wait.eq(~rst_n)
-        self.comb += platform.request("rst_n").eq(~reset_timer.done)
+        reset_presc = Signal(12)
+        reset_count = Signal(12)
+        reset_done  = Signal()
+        self.comb += reset_done.eq(reset_count == int(16e6) >> 12)
+        self.sync.por += [
+            If(rst_n,
+                reset_presc.eq(0),
+                reset_count.eq(0)
+            ).Elif(~reset_done,
+                reset_presc.eq(reset_presc + 1),
+                If(reset_presc == 2**12-1,
+                    reset_count.eq(reset_count + 1)
+                )
+            )
+        ]
+        self.comb += platform.request("rst_n").eq(~reset_done)
 
 # BaseSoC ------------------------------------------------------------------------------------------
 
 class BaseSoC(SoCCore):
-    mem_map = {
+    mem_map = {**SoCCore.mem_map, **{
         "hyperram": 0x20000000,
-    }
-    mem_map.update(SoCCore.mem_map)
+    }}
 
     def __init__(self, device="12F", sys_clk_freq=int(48e6), toolchain="trellis", **kwargs):
         platform = ecp5_mini.Platform(device=device, toolchain=toolchain)
 
         # Serial -----------------------------------------------------------------------------------
         kwargs["uart_name"] = "usb_acm" # Enforce UART to USB-ACM
-        # Defaults to USB ACM through ValentyUSB.
-        os.system("git clone https://github.com/litex-hub/valentyusb -b hw_cdc_eptri")
-        sys.path.append("valentyusb")
-        
+        # Defaults to USB ACM through ValentyUSB, an installed package is used when available,
+        # otherwise a local clone (the clone directory itself is only seen as a namespace package).
+        spec = importlib.util.find_spec("valentyusb")
+        if spec is None or spec.origin is None:
+            if not os.path.isdir("valentyusb"):
+                subprocess.run(["git", "clone", "--depth=1", "--single-branch", "-b", "hw_cdc_eptri",
+                    "https://github.com/litex-hub/valentyusb"], stdout=subprocess.DEVNULL, check=True)
+            spec = importlib.util.spec_from_file_location("valentyusb",
+                os.path.join("valentyusb", "valentyusb", "__init__.py"))
+            sys.modules["valentyusb"] = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(sys.modules["valentyusb"])
 
         # SoCCore ----------------------------------------------------------------------------------
+        kwargs.setdefault("ident_version", True)
         SoCCore.__init__(self, platform, sys_clk_freq,
             ident          = "LiteX SoC on ECP5 Mini",
-            ident_version  = True,
             **kwargs)
 
         # CRG --------------------------------------------------------------------------------------
@@ -101,7 +125,10 @@ class BaseSoC(SoCCore):
 
         # HyperRam ---------------------------------------------------------------------------------
         self.submodules.hyperram = HyperRAM(platform.request("hyperram"))
-        self.register_mem("hyperram", self.mem_map["hyperram"], self.hyperram.bus, 8*1024*1024)
+        self.bus.add_slave("hyperram", self.hyperram.bus, SoCRegion(
+            origin = self.mem_map["hyperram"],
+            size   = 8*1024*1024,
+            cached = True))
 
         # Leds -------------------------------------------------------------------------------------
         self.submodules.leds = LedChaser(
@@ -109,29 +136,108 @@ class BaseSoC(SoCCore):
             sys_clk_freq = sys_clk_freq)
         self.add_csr("leds")
 
+# Bitstream Cache ----------------------------------------------------------------------------------
+
+_build_sources = (".v", ".init", ".ys", ".lpf", ".ldf", ".tcl", ".sdc", ".sh", ".bat")
+_build_banner  = re.compile(rb"auto-?generated by|^\W*date\s*:", re.IGNORECASE)
+
+def build_hash(gateware_dir):
+    # Hash the generated gateware sources, skipping the LiteX banner/date lines since they embed the
+    # generation date.
+    h     = hashlib.blake2b()
+    files = sorted(f for f in os.listdir(gateware_dir) if f.endswith(_build_sources))
+    for filename in files:
+        h.update(filename.encode())
+        with open(os.path.join(gateware_dir, filename), "rb") as f:
+            for line in f:
+                if not _build_banner.search(line):
+                    h.update(line)
+    return h.hexdigest()
+
+def build_bitstream(soc, gateware_dir, cache=True):
+    bitstream = os.path.join(gateware_dir, soc.build_name + ".bit")
+    hash_file = os.path.join(gateware_dir, ".build_hash")
+    digest    = build_hash(gateware_dir)
+
+    # Skip Synthesis/Place & Route when sources are unchanged since the last successful build.
+    if not cache:
+        # With ident_version, the identifier and BIOS embed the build time so sources always differ.
+        print("Bitstream cache bypassed (build time in identifier), use --no-ident-version to enable it.")
+    elif os.path.exists(bitstream) and os.path.exists(hash_file):
+        with open(hash_file) as f:
+            if f.read() == digest:
+                print("Gateware sources unchanged, reusing {}".format(bitstream))
+                return
+
+    # Run the build script generated by builder.build(run=False) through the toolchain.
+    # Note: Mirrors GenericToolchain.build (LiteX 2022.12+, checked on 2024.12): build_script() writes
+    # build_<build_name>.sh/.bat and run_script() expects to be called from the gateware directory.
+    script = "build_" + soc.build_name + (".bat" if sys.platform in ("win32", "cygwin") else ".sh")
+    cwd = os.getcwd()
+    os.chdir(gateware_dir)
+    try:
+        soc.platform.toolchain.run_script(script)
+    finally:
+        os.chdir(cwd)
+    with open(hash_file, "w") as f:
+        f.write(digest)
+
 # Build --------------------------------------------------------------------------------------------
 
-def main():
+def add_nextpnr_args(platform, args):
+    # Extra nextpnr-ecp5 arguments, passed to the Trellis toolchain's NextPNRWrapper on finalize.
+    # Note: Relies on YosysNextPNRToolchain's _pnr_opts internals (LiteX 2022.12+, checked on 2024.12).
+    platform.toolchain._pnr_opts += " " + args
+
+@functools.lru_cache(maxsize=None)
+def build_parser():
     parser = argparse.ArgumentParser(description="LiteX SoC on ECP5 Mini")
-    parser.add_argument("--build",              action="store_true", help="Build bitstream")
+    parser.add_argument("--build",              action="store_true", help="Build bitstream (reused when unchanged with --no-ident-version)")
     parser.add_argument("--load",               action="store_true", help="Load bitstream")
     parser.add_argument("--toolchain",          default="trellis",   help="FPGA toolchain: trellis (default) or diamond")
     parser.add_argument("--device",             default="12F",       help="ECP5 device (default: 12F)")
     parser.add_argument("--sys-clk-freq",       default=48e6,        help="System clock frequency (default: 48Mhz)")
+    parser.add_argument("--nextpnr-placer",     default="heap",      help="nextpnr placer: heap (default) or sa", choices=["heap", "sa"])
+    parser.add_argument("--nextpnr-threads",    default=os.cpu_count() or 1, type=int, help="nextpnr threads (default: number of CPUs)")
     builder_args(parser)
     soc_core_args(parser)
-    args = parser.parse_args()
-
-    soc = BaseSoC(toolchain=args.toolchain,
-        device       = args.device,
-        sys_clk_freq = int(float(args.sys_clk_freq)),
-        **soc_core_argdict(args))
-    builder = Builder(soc, **builder_argdict(args))
-    builder.build(run=args.build)
+    trellis_args(parser)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Default LiteX build locations (build name is the platform name, i.e. its module name).
+    build_name   = ecp5_mini.__name__.split(".")[-1]
+    output_dir   = args.output_dir or os.path.join("build", build_name)
+    gateware_dir = args.gateware_dir or os.path.join(output_dir, "gateware")
+    bitstream    = os.path.join(gateware_dir, build_name + ".bit")
+    soc          = None
+
+    # Skip SoC elaboration when only loading an existing bitstream.
+    if args.build or not (args.load and os.path.exists(bitstream)):
+        soc_kwargs = soc_core_argdict(args)
+        soc = BaseSoC(toolchain=args.toolchain,
+            device       = args.device,
+            sys_clk_freq = int(float(args.sys_clk_freq)),
+            **soc_kwargs)
+        builder = Builder(soc, **builder_argdict(args))
+        builder_kargs = {}
+        if args.toolchain == "trellis":
+            builder_kargs = trellis_argdict(args)
+            add_nextpnr_args(soc.platform, "--placer {} --threads {}".format(
+                args.nextpnr_placer, args.nextpnr_threads))
+        builder.build(**builder_kargs, run=False)
+        if args.build:
+            build_bitstream(soc, builder.gateware_dir, cache=not soc_kwargs.get("ident_version", True))
+        bitstream = os.path.join(builder.gateware_dir, soc.build_name + ".bit")
 
     if args.load:
-        prog = soc.platform.create_programmer()
-        prog.load_bitstream(os.path.join(builder.gateware_dir, soc.build_name + ".bit"))
+        if soc is not None:
+            prog = soc.platform.create_programmer()
+        else:
+            prog = ecp5_mini.Platform(device=args.device, toolchain=args.toolchain).create_programmer()
+        prog.load_bitstream(bitstream)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,7 +12,7 @@ from litex.build.dfu import DFUProg
 
 # IOs ----------------------------------------------------------------------------------------------
 
-_io = [
+_io = (
     # Clk / Rst
     ("clk16", 0, Pins("B9"),  IOStandard("LVCMOS33")),
     ("rst_n", 0, Pins("R8"), IOStandard("LVCMOS33")),
@@ -22,7 +22,7 @@ _io = [
 
     # Leds
     ("user_led", 0, Pins("B1 B2"), IOStandard("LVCMOS33")),
-    ("led", 1, Pins("R14 T14 T132 R13 M6 M5 R5 T4"), IOStandard("LVCMOS33")), # Anodes (0 -> 7)
+    ("led", 1, Pins("R14 T14 T13 R13 M6 M5 R5 T4"), IOStandard("LVCMOS33")), # Anodes (0 -> 7)
     ("led", 2, Pins("R12 P12 N12"), IOStandard("LVCMOS33")), # Cathodes via FET (R,G,B)
 
     # HyperRAM
@@ -54,7 +54,7 @@ _io = [
         Subsignal("cs_n", Pins("N8"), IOStandard("LVCMOS33")),
         #Subsignal("clk",  Pins("N9"), IOStandard("LVCMOS33")), # Note: CLK is bound using USRMCLK block
         Subsignal("miso", Pins("T7"), IOStandard("LVCMOS33")),
-        Subsignal("mosi", Pins("UT8"), IOStandard("LVCMOS33")),
+        Subsignal("mosi", Pins("T8"), IOStandard("LVCMOS33")),
         Subsignal("wp",   Pins("M7"), IOStandard("LVCMOS33")),
         Subsignal("hold", Pins("N7"), IOStandard("LVCMOS33")),
     ),
@@ -75,7 +75,7 @@ _io = [
         Subsignal("data", Pins("B10 A10 B11 A11"), Misc("PULLMODE=UP")),
         IOStandard("LVCMOS33"), Misc("SLEWRATE=FAST")
     ),
-]
+)
 
 # Connectors ---------------------------------------------------------------------------------------
 
@@ -91,6 +91,27 @@ _connectors = [
     ("PMODG", "N1  K4  L1  H5  P2  K5  L2  H4"),
     ("PMODH", "R4  P4  R2  P1  T3  R3  T2  R1"),
 ]
+
+# Pins Check ---------------------------------------------------------------------------------------
+
+# CABGA256 balls: rows A-T (without I, O, Q, S), columns 1-16.
+_balls = {row + str(col) for row in "ABCDEFGHJKLMNPRT" for col in range(1, 17)}
+
+def _check_pins(io, connectors):
+    def _check(name, pins):
+        for pin in pins:
+            if pin not in _balls:
+                raise ConstraintError("Invalid pin {} in {}".format(pin, name))
+
+    for name, number, *items in io:
+        for item in items:
+            constraints = item.constraints if isinstance(item, Subsignal) else [item]
+            for constraint in constraints:
+                if isinstance(constraint, Pins):
+                    _check("{}:{}".format(name, number), constraint.identifiers)
+    for name, pins in connectors:
+        _check(name, pins.split())
+
 # Platform -----------------------------------------------------------------------------------------
 
 class Platform(LatticePlatform):
@@ -98,6 +119,7 @@ class Platform(LatticePlatform):
     default_clk_period = 1e9/16e6
 
     def __init__(self, device="12F", toolchain="trellis", **kwargs):
+        _check_pins(_io, _connectors)
         LatticePlatform.__init__(self, "LFE5U-12F-8CABGA256", io=_io, connectors=_connectors,
             toolchain=toolchain, **kwargs)
 
@@ -106,4 +128,4 @@ class Platform(LatticePlatform):
 
     def do_finalize(self, fragment):
         LatticePlatform.do_finalize(self, fragment)
-        self.add_period_constraint(self.lookup_request("clk16", loose=True), 1e9/16e6)
+        self.add_period_constraint(self.lookup_request("clk16", loose=True), self.default_clk_period)
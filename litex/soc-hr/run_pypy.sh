@@ -0,0 +1,34 @@
+#!/bin/sh
+#
+# Run the ecp5_mini.py target under PyPy to speed up Migen/LiteX elaboration.
+#
+# Usage: ./run_pypy.sh [ecp5_mini.py arguments]
+#
+# The PyPy virtualenv is created (and LiteX installed into it) on the first run, override its
+# location with PYPY_VENV. LiteX is pinned to the release this target is checked against (override
+# with LITEX_VERSION); the other packages follow the "standard" set of litex_setup.py.
+
+set -e
+
+SCRIPT_DIR=$(cd "$(dirname "$0")" && pwd)
+PYPY_VENV=${PYPY_VENV:-$SCRIPT_DIR/.venv-pypy}
+LITEX_VERSION=${LITEX_VERSION:-2024.12}
+
+if [ ! -x "$PYPY_VENV/bin/python" ]; then
+    pypy3 -m venv "$PYPY_VENV"
+    "$PYPY_VENV/bin/python" -m pip install \
+        meson \
+        ninja \
+        git+https://github.com/m-labs/migen \
+        git+https://github.com/enjoy-digital/litex@$LITEX_VERSION \
+        git+https://github.com/litex-hub/litehyperbus \
+        git+https://github.com/litex-hub/pythondata-cpu-vexriscv \
+        git+https://github.com/litex-hub/pythondata-software-picolibc \
+        git+https://github.com/litex-hub/pythondata-software-compiler_rt
+fi
+
+# The BIOS build looks up meson/ninja in PATH.
+PATH="$PYPY_VENV/bin:$PATH"
+export PATH
+
+exec "$PYPY_VENV/bin/python" "$SCRIPT_DIR/ecp5_mini.py" "$@"